@@ -0,0 +1,92 @@
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from extract import engine, build_query, extract_table_copy
+from rules import apply_rules
+
+def _best_of(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def benchmark_extract(start_date, end_date, tables=("brek", "trx"), repeat=3):
+    """Membandingkan waktu extract read_sql_query dengan backend COPY untuk tabel yang dipilih."""
+    rows = []
+
+    for table in tables:
+        query, params = build_query(table, start_date, end_date)
+
+        def read_sql():
+            with engine.connect() as conn:
+                return pd.read_sql_query(text(query), conn, params=params)
+
+        sql_time, df_sql = _best_of(read_sql, repeat)
+        copy_time, df_copy = _best_of(lambda: extract_table_copy(table, start_date, end_date), repeat)
+
+        rows.append({
+            "tabel": table,
+            "baris": len(df_sql),
+            "read_sql (detik)": round(sql_time, 3),
+            "copy (detik)": round(copy_time, 3),
+            "speedup": round(sql_time / copy_time, 2) if copy_time else None,
+            "baris sama": len(df_sql) == len(df_copy),
+        })
+
+    result = pd.DataFrame(rows)
+    print(result.to_string(index=False))
+    return result
+
+def _sample_transaksi(rows, seed=0):
+    """Frame transaksi sintetis: ~20% tagihan kosong, sebagian dengan denda dan jumlahbayar kosong."""
+    rng = np.random.default_rng(seed)
+    tagihan = rng.uniform(10000, 500000, rows).round()
+    tagihan[rng.random(rows) < 0.2] = np.nan
+    denda = np.where(rng.random(rows) < 0.3, 5000.0, 0.0)
+    denda[rng.random(rows) < 0.05] = np.nan
+    jumlahbayar = rng.uniform(10000, 500000, rows).round()
+    jumlahbayar[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({"tagihan": tagihan, "denda": denda, "jumlahbayar": jumlahbayar})
+
+def _rules_apply(df):
+    # Implementasi lama per baris, sebagai pembanding
+    df["tagihan"] = df.apply(lambda row: row["jumlahbayar"] if pd.isnull(row["tagihan"]) and row["denda"] == 0 else (row["jumlahbayar"] - row["denda"]) if pd.isnull(row["tagihan"]) else row["tagihan"], axis=1)
+    df = df.dropna(subset=["tagihan"])
+    return df.fillna({"jumlahbayar": 0, "denda": 0})
+
+def benchmark_rules(rows=1_000_000, repeat=1):
+    """Membandingkan pengisian tagihan per baris (apply) dengan apply_rules pada frame sintetis."""
+    sample = _sample_transaksi(rows)
+
+    apply_time, df_apply = _best_of(lambda: _rules_apply(sample.copy()), repeat)
+    rules_time, df_rules = _best_of(lambda: apply_rules(sample.copy(), "transaksi"), repeat)
+
+    result = pd.DataFrame([{
+        "baris": rows,
+        "apply (detik)": round(apply_time, 3),
+        "apply_rules (detik)": round(rules_time, 3),
+        "speedup": round(apply_time / rules_time, 1) if rules_time else None,
+        "hasil sama": df_apply.equals(df_rules),
+    }])
+    print(result.to_string(index=False))
+    return result
+
+if __name__ == "__main__":
+    # python benchmark.py rules [jumlah_baris]
+    if len(sys.argv) > 1 and sys.argv[1] == "rules":
+        benchmark_rules(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+        sys.exit(0)
+
+    # Default: bulan penuh terakhir
+    first_day = datetime.today().replace(day=1)
+    last_month_end = first_day - timedelta(days=1)
+    start_date = sys.argv[1] if len(sys.argv) > 1 else last_month_end.replace(day=1).strftime("%Y-%m-%d")
+    end_date = sys.argv[2] if len(sys.argv) > 2 else last_month_end.strftime("%Y-%m-%d")
+
+    benchmark_extract(start_date, end_date)
@@ -0,0 +1,232 @@
+import io
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# Merge dimensi secara set-based: data baru di-COPY ke temp table, lalu diterapkan ke tabel
+# dimensi dengan satu UPDATE ... FROM dan satu INSERT ... SELECT dalam satu transaksi.
+
+def _integral_floats_as_int(df):
+    # COPY ke kolom integer menolak teks '12.0', jadi kolom float yang semua nilainya bulat ditulis tanpa desimal
+    integral = {
+        column: df[column].astype("Int64")
+        for column in df.select_dtypes("float").columns
+        if (df[column].dropna() % 1 == 0).all()
+    }
+    return df.assign(**integral) if integral else df
+
+def copy_dataframe(cursor, df, table):
+    """Streaming df ke tabel lewat COPY ... FROM STDIN dari buffer CSV di memori."""
+    df = _integral_floats_as_int(df)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+def _copy_to_temp_table(cursor, df, table, temp_table):
+    cursor.execute(f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS SELECT {', '.join(df.columns)} FROM {table} WITH NO DATA")
+    copy_dataframe(cursor, df, temp_table)
+
+    # Temp table tidak dianalisis autovacuum; tanpa statistik planner memilih nested loop
+    cursor.execute(f"ANALYZE {temp_table}")
+
+def merge_dimension(df, table, key_columns, engine):
+    """
+    Menerapkan df ke tabel dimensi berdasarkan natural key: baris yang kuncinya sudah ada diupdate
+    jika nilainya berbeda, baris yang kuncinya belum ada diinsert. Jumlah round trip ke database
+    tetap, berapa pun banyaknya baris yang berubah.
+
+    Mengembalikan dict berisi 'updated' dan 'inserted' (DataFrame baris yang benar-benar berubah
+    di database) serta 'counts' (jumlah baris inserted, updated, dan unchanged).
+    """
+    columns = list(df.columns)
+    value_columns = [column for column in columns if column not in key_columns]
+    temp_table = f"tmp_{table}"
+
+    # Satu baris per natural key, baris terakhir yang dipakai
+    df = df.drop_duplicates(subset=key_columns, keep="last")
+
+    key_match = " AND ".join(f"t.{column} = s.{column}" for column in key_columns)
+    select_list = ", ".join(f"t.{column}" for column in columns)
+
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        _copy_to_temp_table(cursor, df, table, temp_table)
+
+        updated = []
+        if value_columns:
+            set_list = ", ".join(f"{column} = s.{column}" for column in value_columns)
+            changed = " OR ".join(f"t.{column} IS DISTINCT FROM s.{column}" for column in value_columns)
+            cursor.execute(f"""
+                UPDATE {table} AS t
+                SET {set_list}
+                FROM {temp_table} AS s
+                WHERE {key_match} AND ({changed})
+                RETURNING {select_list}
+            """)
+            updated = cursor.fetchall()
+
+        # ON CONFLICT menjaga insert tetap aman jika tabel dimensi punya unique constraint
+        cursor.execute(f"""
+            INSERT INTO {table} AS t ({", ".join(columns)})
+            SELECT {", ".join(f"s.{column}" for column in columns)}
+            FROM {temp_table} AS s
+            WHERE NOT EXISTS (SELECT 1 FROM {table} AS t WHERE {key_match})
+            ON CONFLICT DO NOTHING
+            RETURNING {select_list}
+        """)
+        inserted = cursor.fetchall()
+
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+    counts = {
+        "inserted": len(inserted),
+        "updated": len(updated),
+        "unchanged": len(df) - len(inserted) - len(updated),
+    }
+    print(f"Merge {table}: {counts['inserted']} baris diinsert, {counts['updated']} baris diupdate, {counts['unchanged']} baris tidak berubah.")
+    return {
+        "updated": pd.DataFrame(updated, columns=columns),
+        "inserted": pd.DataFrame(inserted, columns=columns),
+        "counts": counts,
+    }
+
+# SCD Type 2: setiap perubahan atribut yang dilacak menutup versi lama (valid_to, is_current = FALSE)
+# dan menambah versi baru. Perubahan dideteksi dengan membandingkan hash int64 per baris.
+SCD2_COLUMN_NAMES = ["valid_from", "valid_to", "is_current", "row_hash"]
+SCD2_COLUMNS = """
+    ADD COLUMN IF NOT EXISTS valid_from DATE NOT NULL DEFAULT DATE '1900-01-01',
+    ADD COLUMN IF NOT EXISTS valid_to DATE,
+    ADD COLUMN IF NOT EXISTS is_current BOOLEAN NOT NULL DEFAULT TRUE,
+    ADD COLUMN IF NOT EXISTS row_hash BIGINT
+"""
+
+def hash_rows(df, columns):
+    """Hash int64 per baris dari kolom yang dipilih; nilai sama menghasilkan hash sama apa pun dtype-nya."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy().view("int64")
+
+def ensure_scd2_columns(table, tracked_columns, engine):
+    """Menambah kolom SCD2 ke tabel dimensi dan mengisi row_hash baris lama yang belum punya hash."""
+    with engine.begin() as conn:
+        existing = {
+            row[0] for row in conn.execute(text("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = :table
+            """), {"table": table})
+        }
+        # ALTER TABLE mengambil lock ACCESS EXCLUSIVE walaupun tidak ada yang berubah, jadi hanya
+        # dijalankan jika memang ada kolom yang belum ada
+        if not set(SCD2_COLUMN_NAMES) <= existing:
+            conn.execute(text(f"ALTER TABLE {table} {SCD2_COLUMNS}"))
+
+    df_missing = pd.read_sql(
+        f"SELECT ctid::text AS row_id, {', '.join(tracked_columns)} FROM {table} WHERE row_hash IS NULL",
+        engine,
+    )
+    if df_missing.empty:
+        return
+
+    # Dinormalisasi seperti data baru di transform, agar hash baris lama dan baris baru yang nilainya
+    # sama tidak berbeda hanya karena tipe kolom hasil read_sql
+    df_missing = df_missing.assign(**{column: df_missing[column].astype(str) for column in tracked_columns})
+    df_missing = pd.DataFrame({"row_id": df_missing["row_id"], "row_hash": hash_rows(df_missing, tracked_columns)})
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        cursor.execute(f"CREATE TEMP TABLE tmp_{table}_hash (row_id TEXT, row_hash BIGINT) ON COMMIT DROP")
+        buffer = io.StringIO()
+        df_missing.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY tmp_{table}_hash FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(f"""
+            UPDATE {table} AS t SET row_hash = s.row_hash
+            FROM tmp_{table}_hash AS s
+            WHERE t.ctid = s.row_id::tid
+        """)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+    print(f"row_hash {len(df_missing)} baris lama di {table} diisi.")
+
+def merge_dimension_scd2(df, table, key_columns, tracked_columns, engine, current=None, carried_columns=()):
+    """
+    Menerapkan df ke tabel dimensi SCD2. Baris dengan natural key baru diinsert sebagai versi aktif;
+    baris yang hash atribut terlacaknya berbeda dari versi aktif menutup versi tersebut per hari ini
+    dan diinsert sebagai versi baru.
+
+    current adalah natural key dan row_hash versi aktif yang sudah dibaca sebelumnya (mis. dari
+    DimensionCache); jika None dibaca dari database. carried_columns ikut disimpan pada versi baru
+    tetapi tidak dilacak (mis. surrogate key). Mengembalikan dict yang sama dengan
+    merge_dimension ditambah 'current' berisi versi aktif setelah merge.
+    """
+    columns = key_columns + tracked_columns + list(carried_columns)
+    df = df[columns].drop_duplicates(subset=key_columns, keep="last").reset_index(drop=True)
+    df["row_hash"] = hash_rows(df, tracked_columns)
+
+    # Hanya kunci dan hash versi aktif yang dibaca, perbandingan dilakukan sebagai array int64
+    if current is None:
+        ensure_scd2_columns(table, tracked_columns, engine)
+        current = pd.read_sql(f"SELECT {', '.join(key_columns)}, row_hash FROM {table} WHERE is_current", engine)
+    df_current = current.drop_duplicates(subset=key_columns, keep="last").reset_index(drop=True)
+
+    positions = pd.Index(hash_rows(df_current, key_columns)).get_indexer(hash_rows(df, key_columns))
+    current_hash = df_current["row_hash"].to_numpy(dtype="int64")
+
+    is_new = positions == -1
+    is_changed = np.zeros(len(df), dtype=bool)
+    is_changed[~is_new] = current_hash[positions[~is_new]] != df["row_hash"].to_numpy()[~is_new]
+    df_new, df_changed = df[is_new], df[is_changed]
+
+    if not df_new.empty or not df_changed.empty:
+        key_match = " AND ".join(f"t.{column} = s.{column}" for column in key_columns)
+        raw_conn = engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
+            _copy_to_temp_table(cursor, pd.concat([df_new, df_changed]), table, f"tmp_{table}")
+            cursor.execute(f"""
+                UPDATE {table} AS t
+                SET valid_to = CURRENT_DATE, is_current = FALSE
+                FROM tmp_{table} AS s
+                WHERE {key_match} AND t.is_current
+            """)
+            cursor.execute(f"""
+                INSERT INTO {table} ({', '.join(columns)}, row_hash, valid_from, valid_to, is_current)
+                SELECT {', '.join(columns)}, row_hash, CURRENT_DATE, NULL, TRUE
+                FROM tmp_{table}
+            """)
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+
+    # Versi aktif yang diganti dikeluarkan, versi baru ditambahkan
+    still_current = np.ones(len(df_current), dtype=bool)
+    still_current[positions[is_changed]] = False
+    df_current = pd.concat(
+        [df_current[still_current], df_new[key_columns + ["row_hash"]], df_changed[key_columns + ["row_hash"]]],
+        ignore_index=True,
+    )
+
+    counts = {
+        "inserted": len(df_new),
+        "updated": len(df_changed),
+        "unchanged": len(df) - len(df_new) - len(df_changed),
+    }
+    print(f"Merge SCD2 {table}: {counts['inserted']} baris baru, {counts['updated']} versi baru, {counts['unchanged']} baris tidak berubah.")
+    return {
+        "updated": df_changed[columns].reset_index(drop=True),
+        "inserted": df_new[columns].reset_index(drop=True),
+        "counts": counts,
+        "current": df_current,
+    }
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Stage transform sebagian besar menunggu database (read_sql/COPY) sehingga thread cukup;
+# process pool tidak dipakai karena engine dan DimensionCache tidak bisa dipickle.
+DEFAULT_WORKERS = 4
+
+# Interval sampling RSS proses selama DAG berjalan (detik)
+RSS_SAMPLE_INTERVAL = 0.05
+
+class RssSampler:
+    """
+    Mencatat RSS proses secara berkala di thread terpisah. Karena stage berjalan paralel dalam
+    satu proses, peak RSS sebuah stage adalah RSS tertinggi proses selama stage tersebut berjalan.
+    Tanpa psutil tidak ada sampel yang dicatat dan peak bernilai None.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._process = psutil.Process() if psutil is not None else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        if self._process is not None:
+            self.samples.append((time.perf_counter(), self._process.memory_info().rss))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        if self._process is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def peak(self, started, finished):
+        values = [rss for at, rss in self.samples if started <= at <= finished]
+        return max(values) if values else None
+
+def _timed(sampler, func, *args):
+    sampler.sample()
+    started = time.perf_counter()
+    result = func(*args)
+    finished = time.perf_counter()
+    sampler.sample()
+    return result, finished - started, sampler.peak(started, time.perf_counter())
+
+def run_dag(stages, max_workers=DEFAULT_WORKERS):
+    """
+    Menjalankan stage sesuai dependensinya; stage yang tidak saling bergantung berjalan paralel.
+
+    stages berupa dict nama -> (fungsi, [nama dependensi]). Fungsi dipanggil dengan hasil
+    dependensinya sebagai argumen, urut sesuai daftar dependensi. Mengembalikan
+    (hasil per stage, durasi per stage dalam detik, peak RSS per stage dalam byte). Error pada
+    satu stage dilempar ulang setelah stage yang sedang berjalan selesai; stage berikutnya
+    tidak dijalankan.
+    """
+    for name, (_, dependencies) in stages.items():
+        unknown = [dependency for dependency in dependencies if dependency not in stages]
+        if unknown:
+            raise ValueError(f"Stage {name} bergantung pada stage yang tidak ada: {unknown}")
+
+    results, timings, peak_rss = {}, {}, {}
+    pending = dict(stages)
+    running = {}
+
+    with RssSampler() as sampler, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name, (_, dependencies) in pending.items() if all(d in results for d in dependencies)]
+            for name in ready:
+                func, dependencies = pending.pop(name)
+                running[executor.submit(_timed, sampler, func, *[results[d] for d in dependencies])] = name
+
+            if not running:
+                raise ValueError(f"Dependensi stage melingkar: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name], timings[name], peak_rss[name] = future.result()
+
+    return results, timings, peak_rss
+
+def _format_rss(rss):
+    return f"{rss / (1024 * 1024):.1f} MB" if rss is not None else "-"
+
+def print_timings(timings, wall_time, peak_rss=None):
+    peak_rss = peak_rss or {}
+    print("Waktu dan peak RSS per stage transform:")
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f"  {name}: {seconds:.2f} detik, peak RSS {_format_rss(peak_rss.get(name))}")
+    print(f"  total (wall): {wall_time:.2f} detik, jumlah durasi stage: {sum(timings.values()):.2f} detik")
+    peaks = [rss for rss in peak_rss.values() if rss is not None]
+    if peaks:
+        print(f"  peak RSS transform: {_format_rss(max(peaks))}")
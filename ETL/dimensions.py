@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+try:
+    from .bulk import ensure_scd2_columns
+except ImportError:
+    from bulk import ensure_scd2_columns
+
+# id_pelanggan adalah surrogate key integer pelanggan: sama untuk semua versi SCD2 satu kodepelanggan
+# dan disimpan di tabel fakta sebagai kunci join ke dim_pelanggan. kodepelanggan tetap ada untuk tampilan.
+# Tabel fakta beserta kolom kode pelanggannya:
+PELANGGAN_FACT_TABLES = {
+    "fact_transaksi": "kodepelanggan",
+    "fact_pemutusan": "kodepelanggan",
+    "fact_pengaduan": "idpelanggan",
+}
+
+# id_pelanggan baru diambil dari sequence dim_pelanggan_id_pelanggan_seq (bukan default kolom, karena
+# versi SCD2 baru memakai id versi lama). Pemberian id diserialkan antar sesi ETL (ETL terjadwal dan
+# tombol ETL dashboard) dengan advisory lock, sehingga satu kode tidak mendapat dua id.
+PELANGGAN_ID_LOCK = "SELECT pg_advisory_xact_lock(hashtext('dim_pelanggan.id_pelanggan'))"
+
+def ensure_pelanggan_surrogate_key(engine):
+    """Menambah kolom id_pelanggan ke dim_pelanggan dan tabel fakta, lalu mengisi baris yang sudah ada."""
+    with engine.begin() as conn:
+        tables_with_key = {
+            row[0] for row in conn.execute(text("""
+                SELECT table_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND column_name = 'id_pelanggan'
+            """))
+        }
+
+        if "dim_pelanggan" not in tables_with_key:
+            print("Menambahkan surrogate key id_pelanggan ke dim_pelanggan...")
+            conn.execute(text("ALTER TABLE dim_pelanggan ADD COLUMN id_pelanggan INTEGER"))
+            conn.execute(text("""
+                UPDATE dim_pelanggan AS d SET id_pelanggan = k.id_pelanggan
+                FROM (
+                    SELECT kodepelanggan, DENSE_RANK() OVER (ORDER BY kodepelanggan) AS id_pelanggan
+                    FROM dim_pelanggan GROUP BY kodepelanggan
+                ) AS k
+                WHERE d.kodepelanggan = k.kodepelanggan
+            """))
+
+        for table, code_column in PELANGGAN_FACT_TABLES.items():
+            if table in tables_with_key:
+                continue
+            print(f"Menambahkan id_pelanggan ke {table}...")
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN id_pelanggan INTEGER"))
+            conn.execute(text(f"""
+                UPDATE {table} AS f SET id_pelanggan = d.id_pelanggan
+                FROM (SELECT DISTINCT kodepelanggan, id_pelanggan FROM dim_pelanggan) AS d
+                WHERE f.{code_column} = d.kodepelanggan
+            """))
+
+        conn.execute(text(PELANGGAN_ID_LOCK))
+        ensure_id_sequence(conn, "dim_pelanggan", "id_pelanggan")
+
+def assign_pelanggan_ids(engine):
+    """
+    Mengisi id_pelanggan versi dim_pelanggan yang masih kosong: kode yang sudah punya id di versi lain
+    memakai id tersebut, kode baru mendapat id dari sequence. Mengembalikan id per kodepelanggan yang
+    baru diisi (Series berindeks kodepelanggan) untuk disimpan di cache.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(PELANGGAN_ID_LOCK))
+        rows = conn.execute(text("""
+            WITH missing AS (
+                SELECT DISTINCT kodepelanggan FROM dim_pelanggan WHERE id_pelanggan IS NULL
+            ), ids AS (
+                SELECT m.kodepelanggan, COALESCE(
+                    (SELECT MIN(d.id_pelanggan) FROM dim_pelanggan AS d WHERE d.kodepelanggan = m.kodepelanggan),
+                    nextval('dim_pelanggan_id_pelanggan_seq')
+                ) AS id_pelanggan
+                FROM missing AS m
+            )
+            UPDATE dim_pelanggan AS d SET id_pelanggan = ids.id_pelanggan
+            FROM ids
+            WHERE d.kodepelanggan = ids.kodepelanggan AND d.id_pelanggan IS NULL
+            RETURNING d.kodepelanggan, d.id_pelanggan
+        """)).all()
+
+    df_ids = pd.DataFrame(rows, columns=["kodepelanggan", "id_pelanggan"]).drop_duplicates("kodepelanggan")
+    if not df_ids.empty:
+        print(f"id_pelanggan diberikan untuk {len(df_ids)} kode pelanggan baru.")
+    return pd.Series(df_ids["id_pelanggan"].to_numpy(dtype="int64"), index=df_ids["kodepelanggan"].astype(str))
+
+def ensure_id_sequence(conn, table, column):
+    """
+    Membuat sequence {table}_{column}_seq jika belum ada dan memajukannya melewati nilai terbesar
+    kolom, agar id dari sequence tidak bentrok dengan id yang diberikan sebelum sequence dipakai.
+    """
+    sequence = f"{table}_{column}_seq"
+    conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {sequence} OWNED BY {table}.{column}"))
+    conn.execute(text(f"""
+        SELECT setval('{sequence}', m.max_id)
+        FROM (SELECT MAX({column}) AS max_id FROM {table}) AS m, {sequence} AS s
+        WHERE m.max_id > s.last_value OR (m.max_id = s.last_value AND NOT s.is_called)
+    """))
+    return sequence
+
+def ensure_jenispengaduan_sequence(engine):
+    """
+    id_jenispengaduan diisi sequence di database seperti id_realisasi, bukan max + 1 dari cache sesi
+    yang bisa bentrok dengan sesi ETL lain. Unique index jenis_pengaduan membuat insert jenis yang sama
+    dari dua sesi tidak menghasilkan dua id.
+    """
+    with engine.begin() as conn:
+        has_default = conn.execute(text("""
+            SELECT column_default IS NOT NULL FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'dim_jenispengaduan'
+                AND column_name = 'id_jenispengaduan'
+        """)).scalar()
+        if has_default:
+            return
+        print("Menambahkan sequence id_jenispengaduan ke dim_jenispengaduan...")
+        sequence = ensure_id_sequence(conn, "dim_jenispengaduan", "id_jenispengaduan")
+        conn.execute(text(f"ALTER TABLE dim_jenispengaduan ALTER COLUMN id_jenispengaduan SET DEFAULT nextval('{sequence}')"))
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_dim_jenispengaduan_jenis ON dim_jenispengaduan (jenis_pengaduan)"))
+    except Exception as e:
+        print(f"Gagal membuat unique index dim_jenispengaduan, periksa jenis_pengaduan duplikat: {e}")
+
+def _read_ids(engine, table, id_column, name_column, names):
+    return pd.read_sql(
+        f"SELECT {id_column}, {name_column} FROM {table} WHERE {name_column} = ANY(%(names)s) ORDER BY {id_column}",
+        engine,
+        params={"names": list(names)},
+    )
+
+class DimensionCache:
+    """
+    Isi dimensi yang dibutuhkan transform, dibaca dari datamart sekali per sesi ETL lalu diperbarui
+    di memori saat transform menambah anggota baru. Satu objek dipakai untuk semua bulan dalam
+    satu kali run_monthly_etl/backfill agar dimensi tidak dibaca ulang setiap bulan.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._pelanggan = None
+        self._pelanggan_ids = None
+        self._jenispengaduan = None
+        self._realisasi = None
+        self._last_id_waktu = None
+
+    def pelanggan(self):
+        """Natural key dan row_hash versi aktif dim_pelanggan."""
+        if self._pelanggan is None:
+            ensure_scd2_columns("dim_pelanggan", ["status"], self.engine)
+            self._pelanggan = pd.read_sql(
+                "SELECT kodepelanggan, wilayah, row_hash FROM dim_pelanggan WHERE is_current",
+                self.engine,
+            )
+        return self._pelanggan
+
+    def set_pelanggan(self, df_current):
+        self._pelanggan = df_current
+
+    def pelanggan_ids(self):
+        """Encoder kodepelanggan -> id_pelanggan (Series berindeks kodepelanggan)."""
+        if self._pelanggan_ids is None:
+            ensure_pelanggan_surrogate_key(self.engine)
+            df_ids = pd.read_sql(
+                "SELECT kodepelanggan, MIN(id_pelanggan) AS id_pelanggan FROM dim_pelanggan GROUP BY kodepelanggan",
+                self.engine,
+            )
+            self._pelanggan_ids = pd.Series(df_ids['id_pelanggan'].to_numpy(dtype="int64"), index=df_ids['kodepelanggan'])
+        return self._pelanggan_ids
+
+    def add_pelanggan_ids(self, new_ids):
+        """Menyimpan id hasil assign_pelanggan_ids; kode yang sudah dikenal tidak diganti."""
+        ids = self.pelanggan_ids()
+        self._pelanggan_ids = pd.concat([ids, new_ids[ids.index.get_indexer(new_ids.index) == -1]])
+
+    def encode_pelanggan(self, kodepelanggan):
+        """Mengubah kodepelanggan menjadi id_pelanggan; kode yang tidak dikenal menjadi NA."""
+        ids = self.pelanggan_ids()
+        positions = ids.index.get_indexer(pd.Series(kodepelanggan).astype(str))
+        missing = positions == -1
+        values = ids.to_numpy()[positions] if not ids.empty else np.zeros(len(positions), dtype="int64")
+        return pd.arrays.IntegerArray(np.where(missing, 0, values), missing)
+
+    def last_id_waktu(self):
+        if self._last_id_waktu is None:
+            try:
+                last_id_result = pd.read_sql("SELECT MAX(id_waktu) AS last_id FROM dim_waktu", self.engine)
+                self._last_id_waktu = int(last_id_result['last_id'].fillna(0).iloc[0])
+            except Exception as e:
+                print("Tabel dim_waktu masih kosong:", str(e))
+                return 0
+        return self._last_id_waktu
+
+    def set_last_id_waktu(self, last_id):
+        self._last_id_waktu = last_id
+
+    def jenispengaduan(self):
+        if self._jenispengaduan is None:
+            ensure_jenispengaduan_sequence(self.engine)
+            self._jenispengaduan = pd.read_sql(
+                "SELECT id_jenispengaduan, jenis_pengaduan FROM dim_jenispengaduan",
+                self.engine,
+            )
+        return self._jenispengaduan
+
+    def refresh_jenispengaduan(self, jenis_pengaduan):
+        """Membaca id jenis pengaduan yang baru diinsert (oleh sesi ini atau sesi ETL lain)."""
+        df_new = _read_ids(self.engine, "dim_jenispengaduan", "id_jenispengaduan", "jenis_pengaduan", jenis_pengaduan)
+        known = self.jenispengaduan()
+        self._jenispengaduan = pd.concat(
+            [known, df_new[~df_new['jenis_pengaduan'].isin(known['jenis_pengaduan'])]],
+            ignore_index=True,
+        )
+
+    def realisasi(self):
+        if self._realisasi is None:
+            self._realisasi = pd.read_sql("SELECT id_realisasi, jenis_realisasi FROM dim_realisasi", self.engine)
+        return self._realisasi
+
+    def refresh_realisasi(self, jenis_realisasi):
+        """Membaca id realisasi yang baru diinsert (id diisi oleh sequence di database)."""
+        df_new = _read_ids(self.engine, "dim_realisasi", "id_realisasi", "jenis_realisasi", jenis_realisasi)
+        known = self.realisasi()
+        self._realisasi = pd.concat(
+            [known, df_new[~df_new['jenis_realisasi'].isin(known['jenis_realisasi'])]],
+            ignore_index=True,
+        )
@@ -0,0 +1,140 @@
+import re
+import time
+from sqlalchemy import text
+
+try:
+    from .partitions import PARTITIONED_TABLES, is_partitioned
+except ImportError:
+    from partitions import PARTITIONED_TABLES, is_partitioned
+
+# Backfill banyak bulan menunda pemeliharaan index sekunder tabel fakta: definisi index dicatat di
+# DEFERRED_INDEX_TABLE dan index di-drop sebelum load, lalu dibangun ulang setelah semua bulan dimuat.
+# Catatan dan DROP INDEX ada di transaksi yang sama, jadi index yang hilang selalu punya catatan; jika
+# proses mati di tengah backfill, load berikutnya membangun ulang index yang tercatat tetapi tidak ada.
+# Unique index (natural key dan primary key) tidak ditunda karena dipakai ON CONFLICT saat swap.
+DEFERRED_INDEX_TABLE = "etl_deferred_indexes"
+FACT_TABLES = PARTITIONED_TABLES
+
+def ensure_deferred_index_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {DEFERRED_INDEX_TABLE} (
+            index_name TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            definition TEXT NOT NULL,
+            dropped_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """))
+
+def secondary_indexes(conn, table):
+    """Index non-unique milik tabel (induk, bukan partisinya) yang tidak dipakai constraint."""
+    return conn.execute(text("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(:table) AND NOT i.indisunique
+            AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid)
+    """), {"table": table}).all()
+
+def defer_fact_indexes(engine):
+    """Mencatat lalu men-drop index sekunder tabel fakta. Mengembalikan nama index yang ditunda."""
+    deferred = []
+    with engine.begin() as conn:
+        ensure_deferred_index_table(conn)
+        for table in FACT_TABLES:
+            for name, definition in secondary_indexes(conn, table):
+                conn.execute(text(f"""
+                    INSERT INTO {DEFERRED_INDEX_TABLE} (index_name, table_name, definition)
+                    VALUES (:name, :table, :definition)
+                    ON CONFLICT (index_name) DO UPDATE SET definition = EXCLUDED.definition
+                """), {"name": name, "table": table, "definition": definition})
+                conn.execute(text(f"DROP INDEX {name}"))
+                deferred.append(name)
+
+    if deferred:
+        print(f"Index sekunder tabel fakta ditunda sampai backfill selesai: {', '.join(deferred)}")
+    return deferred
+
+def _index_state(conn, name):
+    """None jika index tidak ada, selain itu apakah index valid (build CONCURRENTLY yang gagal meninggalkan index tidak valid)."""
+    return conn.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name},
+    ).scalar()
+
+def _index_method(definition):
+    # pg_get_indexdef: "CREATE INDEX nama ON [ONLY] tabel USING metode (kolom) [WHERE ...]"
+    return definition.split(" USING ", 1)[1]
+
+def _build_table_index(conn, name, definition):
+    if _index_state(conn, name) is False:
+        conn.execute(text(f"DROP INDEX {name}"))
+    definition = re.sub(r" ON (ONLY )?", " ON ", definition, count=1)
+    conn.execute(text(definition.replace("CREATE INDEX ", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ", 1)))
+
+def _build_partitioned_index(conn, table, name, definition):
+    """
+    CREATE INDEX CONCURRENTLY tidak bisa dijalankan pada tabel berpartisi, jadi index induk dibuat
+    dengan ON ONLY (belum valid), index setiap partisi dibangun CONCURRENTLY lalu di-attach.
+    Index induk otomatis valid setelah semua partisi punya index; partisi yang sudah selesai
+    dilewati jika build sebelumnya terhenti.
+    """
+    if _index_state(conn, name) is None:
+        conn.execute(text(re.sub(r" ON (ONLY )?", " ON ONLY ", definition, count=1)))
+
+    partitions = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits h JOIN pg_class c ON c.oid = h.inhrelid
+        WHERE h.inhparent = to_regclass(:table) ORDER BY c.relname
+    """), {"table": table}).scalars().all()
+    attached = set(conn.execute(text("""
+        SELECT t.relname FROM pg_inherits h
+        JOIN pg_index i ON i.indexrelid = h.inhrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE h.inhparent = to_regclass(:name)
+    """), {"name": name}).scalars())
+
+    for partition in partitions:
+        if partition in attached:
+            continue
+        partition_index = f"{partition}_{name}"
+        if _index_state(conn, partition_index) is False:
+            conn.execute(text(f"DROP INDEX {partition_index}"))
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} USING {_index_method(definition)}"))
+        conn.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}"))
+
+def restore_deferred_indexes(engine):
+    """
+    Membangun ulang index yang tercatat di DEFERRED_INDEX_TABLE tetapi hilang atau belum valid, lalu
+    menghapus catatannya. Index yang gagal dibangun tetap tercatat dan dicoba lagi pada run berikutnya.
+    Mengembalikan tabel yang index-nya dibangun ulang.
+    """
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT to_regclass(:table)"), {"table": DEFERRED_INDEX_TABLE}).scalar():
+            return []
+        deferred = conn.execute(text(f"SELECT index_name, table_name, definition FROM {DEFERRED_INDEX_TABLE} ORDER BY table_name, index_name")).all()
+
+    restored = []
+    # CONCURRENTLY tidak boleh berjalan di dalam transaksi, jadi pakai AUTOCOMMIT
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, table, definition in deferred:
+            try:
+                if _index_state(conn, name) is not True:
+                    started = time.perf_counter()
+                    print(f"Membangun ulang index {name} di {table}...")
+                    if is_partitioned(conn, table):
+                        _build_partitioned_index(conn, table, name, definition)
+                    else:
+                        _build_table_index(conn, name, definition)
+                    print(f"Index {name} selesai dalam {time.perf_counter() - started:.2f} detik.")
+                    restored.append(table)
+                conn.execute(text(f"DELETE FROM {DEFERRED_INDEX_TABLE} WHERE index_name = :name"), {"name": name})
+            except Exception as e:
+                print(f"Gagal membangun ulang index {name}, dicoba lagi pada run berikutnya: {e}")
+    return sorted(set(restored))
+
+def analyze_fact_tables(engine, tables=FACT_TABLES):
+    """ANALYZE tabel fakta setelah load besar; autovacuum tidak pernah menganalisis tabel induk berpartisi."""
+    started = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in tables:
+            if conn.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar():
+                conn.execute(text(f"ANALYZE {table}"))
+    print(f"ANALYZE {', '.join(tables)} selesai dalam {time.perf_counter() - started:.2f} detik.")
@@ -0,0 +1,42 @@
+import numpy as np
+
+# Aturan kolom turunan dan nilai default untuk tabel fakta, dijalankan per kolom
+# (vektor) dan bukan per baris seperti DataFrame.apply(axis=1).
+
+def fill_tagihan(df):
+    """tagihan kosong diisi jumlahbayar, dikurangi denda jika ada denda."""
+    tagihan_dari_bayar = np.where(df['denda'] == 0, df['jumlahbayar'], df['jumlahbayar'] - df['denda'])
+    return df['tagihan'].mask(df['tagihan'].isna(), tagihan_dari_bayar)
+
+# Kolom yang dihitung ulang, dijalankan berurutan sebelum REQUIRED_COLUMNS dan FILL_DEFAULTS
+DERIVED_COLUMNS = {
+    "transaksi": {
+        "tagihan": fill_tagihan,
+    },
+}
+
+# Baris yang kolom ini masih kosong setelah DERIVED_COLUMNS dibuang
+REQUIRED_COLUMNS = {
+    "transaksi": ["tagihan"],
+}
+
+# Nilai default untuk kolom yang kosong
+FILL_DEFAULTS = {
+    "transaksi": {"jumlahbayar": 0, "denda": 0},
+    "sbbaru": {"jumlah": 0},
+}
+
+def apply_rules(df, table):
+    """Menjalankan aturan kolom turunan, buang baris tidak lengkap, lalu isi nilai default."""
+    for column, rule in DERIVED_COLUMNS.get(table, {}).items():
+        df[column] = rule(df)
+
+    required = REQUIRED_COLUMNS.get(table)
+    if required:
+        df = df.dropna(subset=required)
+
+    defaults = FILL_DEFAULTS.get(table)
+    if defaults:
+        df = df.fillna(defaults)
+
+    return df
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# Kolom brek dan trx yang dipakai transform_transaksi. Kolom tagihan/pemakaian/kodegoltarif
+# dan jumlahbayar/denda tersebar di kedua tabel, jadi keduanya memakai daftar yang sama dan
+# extract hanya memilih kolom yang memang ada di tabel tersebut.
+TRANSAKSI_SCHEMA = {
+    "kodepelanggan": None,
+    "tahun": "int32",
+    "bulan": "int32",
+    "kodegoltarif": "category",
+    "pemakaian": "float64",
+    "tagihan": "float64",
+    "jumlahbayar": "float64",
+    "denda": "float64",
+}
+
+# Kolom yang diambil per tabel sumber beserta dtype ringkasnya.
+# None berarti kolom diambil apa adanya (kunci string, tanggal, dan kolom yang nilainya diubah di transform).
+TABLE_SCHEMAS = {
+    "pelanggan": {
+        "kodepelanggan": None,
+        "wilayah": "category",
+        "status": "category",
+    },
+    "goltarif": {
+        "kodegoltarif": None,
+        "namagoltarif": None,
+    },
+    "brek": TRANSAKSI_SCHEMA,
+    "trx": TRANSAKSI_SCHEMA,
+    "transaksi": TRANSAKSI_SCHEMA,
+    "pemutusan": {
+        "kodepelanggan": None,
+        "tglstk": None,
+        "realisasistk": "category",
+    },
+    "pengaduan": {
+        "idpelanggan": None,
+        "tgl": None,
+        "jnspengaduan": "category",
+    },
+    "sbbaru": {
+        "kodecpelanggan": None,
+        "tglreg": None,
+        "realisasi": "category",
+        "jumlah": "float64",
+    },
+}
+
+def project_columns(table, available_columns):
+    """Daftar kolom yang diambil dari tabel; None jika tabel tidak punya schema (ambil semua)."""
+    schema = TABLE_SCHEMAS.get(table)
+    if schema is None:
+        return None
+    return [column for column in schema if column in available_columns]
+
+def apply_schema(df, table):
+    """Mengubah dtype kolom sesuai TABLE_SCHEMAS; kolom yang gagal dikonversi dibiarkan apa adanya."""
+    schema = TABLE_SCHEMAS.get(table, {})
+
+    for column, dtype in schema.items():
+        if dtype is None or column not in df.columns:
+            continue
+        try:
+            df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError) as e:
+            print(f"Kolom {table}.{column} tidak bisa diubah ke {dtype}: {e}")
+
+    return df
+
+def recode_categories(series, mapper, na_value=None):
+    """
+    Menerapkan mapper ke setiap kategori, bukan ke setiap baris; kategori yang hasilnya sama digabung.
+    Nilai kosong diganti na_value jika diberikan. Hasilnya tetap categorical.
+    """
+    series = series.astype("category")
+    mapped = series.cat.categories.map(mapper)
+    categories = (mapped.append(pd.Index([na_value])) if na_value is not None else mapped).dropna().unique()
+
+    # Kode -1 (nilai kosong) mengambil elemen terakhir lookup, yaitu kode na_value
+    na_code = categories.get_loc(na_value) if na_value is not None else -1
+    lookup = np.append(categories.get_indexer(mapped), na_code)
+    new_codes = lookup[series.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories), index=series.index, name=series.name)
+
+def lookup_categories(series, mapping):
+    """
+    Nilai mapping (Series berindeks nilai kategori) untuk setiap baris: dicari sekali per kategori
+    lalu disebar ke baris lewat kode kategori, tanpa merge. Nilai yang tidak ada di mapping menjadi NaN.
+    """
+    series = series.astype("category").cat.remove_unused_categories()
+    values = mapping[~mapping.index.duplicated()].reindex(series.cat.categories).to_numpy()
+    codes = series.cat.codes.to_numpy()
+    if (codes == -1).any():
+        values = np.append(values, np.nan)
+    return pd.Series(values[codes], index=series.index)
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import pandas as pd
+
+# Lokasi staging hasil extract, bersebelahan dengan cache/forecast.pkl
+STAGING_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "cache", "staging"))
+
+# Data staging kedaluwarsa setelah TTL ini dan total ukurannya dibatasi
+STAGING_TTL_SECONDS = 24 * 60 * 60
+STAGING_MAX_BYTES = 2 * 1024 ** 3
+
+PARQUET_COMPRESSION = "zstd"
+MANIFEST_FILE = "manifest.json"
+
+def options_key(options):
+    """Hash opsi extract (backend, kolom yang diambil, dll.); data staging hanya dipakai jika opsinya sama."""
+    encoded = json.dumps(options or {}, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+def stage_dir(start_date, end_date, options=None):
+    return os.path.join(STAGING_DIR, f"{start_date}_{end_date}_{options_key(options)}")
+
+def file_checksum(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def discard_staged(start_date, end_date):
+    """Menghapus semua data staging sebuah rentang (apa pun opsinya), misalnya setelah ETL rentang tersebut berhasil."""
+    if not os.path.isdir(STAGING_DIR):
+        return
+    prefix = f"{start_date}_{end_date}_"
+    for name in os.listdir(STAGING_DIR):
+        if name.startswith(prefix):
+            shutil.rmtree(os.path.join(STAGING_DIR, name), ignore_errors=True)
+
+def save_staged(dataframes, start_date, end_date, options=None, metadata=None):
+    """Menyimpan hasil extract sebagai Parquet terkompresi beserta manifest berisi checksum dan opsi extract."""
+    directory = stage_dir(start_date, end_date, options)
+    tmp_directory = f"{directory}.tmp"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+
+    manifest = {"created_at": time.time(), "options": options or {}, "metadata": metadata or {}, "tables": {}}
+    try:
+        for table, df in dataframes.items():
+            path = os.path.join(tmp_directory, f"{table}.parquet")
+            df.to_parquet(path, compression=PARQUET_COMPRESSION, index=False)
+            manifest["tables"][table] = {
+                "file": f"{table}.parquet",
+                "rows": len(df),
+                "sha256": file_checksum(path),
+            }
+
+        # Manifest ditulis terakhir; folder tanpa manifest dianggap tidak lengkap
+        with open(os.path.join(tmp_directory, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+        print(f"Data extract {start_date} - {end_date} disimpan ke staging.")
+    except Exception as e:
+        # Staging hanya optimasi (mis. pyarrow tidak terpasang), jadi ETL tetap lanjut
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        print(f"Gagal menyimpan data ke staging: {e}")
+        return
+
+    evict_staged()
+
+def load_staged(start_date, end_date, options=None):
+    """Mengembalikan (dataframes, metadata) dari staging dengan opsi extract yang sama jika masih berlaku, selain itu None."""
+    directory = stage_dir(start_date, end_date, options)
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+
+    if time.time() - manifest["created_at"] > STAGING_TTL_SECONDS:
+        print(f"Data staging {start_date} - {end_date} sudah kedaluwarsa.")
+        shutil.rmtree(directory, ignore_errors=True)
+        return None
+
+    dataframes = {}
+    try:
+        for table, info in manifest["tables"].items():
+            path = os.path.join(directory, info["file"])
+            if file_checksum(path) != info["sha256"]:
+                raise ValueError(f"checksum {info['file']} tidak cocok")
+            dataframes[table] = pd.read_parquet(path)
+    except Exception as e:
+        print(f"Data staging {start_date} - {end_date} tidak valid, extract ulang: {e}")
+        shutil.rmtree(directory, ignore_errors=True)
+        return None
+
+    print(f"Memakai data staging untuk {start_date} - {end_date}.")
+    return dataframes, manifest["metadata"]
+
+def evict_staged():
+    """Menghapus staging yang kedaluwarsa, lalu yang paling lama jika total ukuran melebihi batas."""
+    if not os.path.isdir(STAGING_DIR):
+        return
+
+    entries = []
+    for name in os.listdir(STAGING_DIR):
+        if name.endswith(".tmp"):
+            continue
+        directory = os.path.join(STAGING_DIR, name)
+        manifest = read_manifest(directory)
+        if manifest is None or time.time() - manifest["created_at"] > STAGING_TTL_SECONDS:
+            shutil.rmtree(directory, ignore_errors=True)
+            continue
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+        entries.append((manifest["created_at"], size, directory))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, directory in sorted(entries):
+        if total_size <= STAGING_MAX_BYTES:
+            break
+        shutil.rmtree(directory, ignore_errors=True)
+        total_size -= size
@@ -24,7 +24,7 @@ engine = get_db_connection()
 
 # Fungsi untuk mengambil data 
 def load_data():
-    dim_pelanggan = pd.read_sql("SELECT * FROM dim_pelanggan", engine)
+    dim_pelanggan = pd.read_sql("SELECT id_pelanggan, kodepelanggan, wilayah, status FROM dim_pelanggan WHERE is_current", engine)
     fact_transaksi = pd.read_sql("SELECT * FROM fact_transaksi", engine)
     dim_goltarif = pd.read_sql("SELECT * FROM dim_goltarif", engine)
     dim_waktu = pd.read_sql("SELECT * FROM dim_waktu", engine)
@@ -435,7 +435,7 @@ def show_dashboard_pemakaian_air():
     with col2:
         fig = go.Figure()
 
-        df_wilayah = fact_transaksi.merge(dim_pelanggan, on="kodepelanggan", how="left")
+        df_wilayah = fact_transaksi.merge(dim_pelanggan.drop(columns="kodepelanggan"), on="id_pelanggan", how="left")
         df_filtered = df_wilayah.merge(dim_waktu, on="id_waktu", how="left")
 
         # Filter berdasarkan tahun yang dipilih
@@ -510,7 +510,7 @@ def show_dashboard_pemakaian_air():
 
 
     with col3:
-        df_wilayah = fact_transaksi.merge(dim_pelanggan, on="kodepelanggan", how="left")
+        df_wilayah = fact_transaksi.merge(dim_pelanggan.drop(columns="kodepelanggan"), on="id_pelanggan", how="left")
         df_filtered = df_wilayah.merge(dim_waktu, on="id_waktu", how="left")
 
         # Filter berdasarkan tahun yang dipilih
@@ -582,7 +582,7 @@ def show_dashboard_pendapatan():
     
     # Gabungkan data transaksi dengan waktu dan pelanggan
     fact_transaksi = fact_transaksi.merge(dim_waktu, on="id_waktu", how="left")
-    fact_transaksi = fact_transaksi.merge(dim_pelanggan, on="kodepelanggan", how="left")
+    fact_transaksi = fact_transaksi.merge(dim_pelanggan.drop(columns="kodepelanggan"), on="id_pelanggan", how="left")
     
     # Filter berdasarkan rentang tahun
     tahun_min, tahun_max = st.sidebar.select_slider(
@@ -1010,7 +1010,7 @@ def show_dashboard_pengaduan():
     # Merge data
     fact_pengaduan = fact_pengaduan.merge(dim_waktu, on="id_waktu", how="left")
     fact_pengaduan = fact_pengaduan.merge(dim_jenispengaduan, on="id_jenispengaduan", how="left")
-    fact_pengaduan = fact_pengaduan.merge(dim_pelanggan, left_on="idpelanggan", right_on="kodepelanggan", how="left")
+    fact_pengaduan = fact_pengaduan.merge(dim_pelanggan, on="id_pelanggan", how="left")
     fact_pengaduan["year"] = fact_pengaduan["year"].astype(str)  
 
     # Filter Rentang Tahun
@@ -1284,7 +1284,7 @@ def show_dashboard_pemutusan():
 
     fact_pemutusan = fact_pemutusan.merge(dim_waktu, on="id_waktu", how="left")
     fact_pemutusan = fact_pemutusan.merge(dim_realisasi, on="id_realisasi", how="left")
-    fact_pemutusan = fact_pemutusan.merge(dim_pelanggan, on="kodepelanggan", how="left")
+    fact_pemutusan = fact_pemutusan.merge(dim_pelanggan.drop(columns="kodepelanggan"), on="id_pelanggan", how="left")
 
     fact_pemutusan["year"] = fact_pemutusan["year"].astype(str)
     fact_pemutusan["month"] = pd.to_numeric(fact_pemutusan["month"])  
@@ -1346,10 +1346,10 @@ def show_dashboard_pemutusan():
             .reset_index()
         )
 
-    # Pemutusan berdasarkan Golongan Tarif
+    # Pemutusan berdasarkan Golongan Tarif; golongan tarif diambil dari fact_transaksi lewat surrogate key
     pemutusan_goltarif = (
         fact_pemutusan_filtered
-        .merge(fact_transaksi, on="kodepelanggan")
+        .merge(fact_transaksi[["id_pelanggan", "kodegoltarif"]].drop_duplicates(), on="id_pelanggan")
         .merge(dim_goltarif, on="kodegoltarif")
     )
 
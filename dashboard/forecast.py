@@ -22,7 +22,7 @@ def load_data():
         SELECT t.*, w.year, w.month, p.wilayah
         FROM fact_transaksi t
         JOIN dim_waktu w ON t.id_waktu = w.id_waktu
-        JOIN dim_pelanggan p ON t.kodepelanggan = p.kodepelanggan
+        JOIN dim_pelanggan p ON t.id_pelanggan = p.id_pelanggan AND p.is_current
     """
     return pd.read_sql(query, engine)
 
@@ -21,7 +21,7 @@ engine = create_engine(DATABASE_URL)
 
 # Fungsi untuk mengambil data pelanggan
 def load_data():
-    dim_pelanggan = pd.read_sql("SELECT * FROM dim_pelanggan", engine)
+    dim_pelanggan = pd.read_sql("SELECT id_pelanggan, kodepelanggan, wilayah, status FROM dim_pelanggan WHERE is_current", engine)
     fact_transaksi = pd.read_sql("SELECT * FROM fact_transaksi", engine)
     dim_goltarif = pd.read_sql("SELECT * FROM dim_goltarif", engine)
     dim_waktu = pd.read_sql("SELECT * FROM dim_waktu", engine)
@@ -380,7 +380,7 @@ def show_dashboard_pendapatan():
     
     # Gabungkan fact_transaksi dengan dim_waktu dan dim_pelanggan
     fact_transaksi = fact_transaksi.merge(dim_waktu, on="id_waktu", how="left")
-    fact_transaksi = fact_transaksi.merge(dim_pelanggan, on="kodepelanggan", how="left")
+    fact_transaksi = fact_transaksi.merge(dim_pelanggan.drop(columns="kodepelanggan"), on="id_pelanggan", how="left")
     
     st.markdown(
     """<style>
@@ -721,7 +721,7 @@ def show_dashboard_pengaduan():
 
     fact_pengaduan = fact_pengaduan.merge(dim_waktu, on="id_waktu", how="left")
     fact_pengaduan = fact_pengaduan.merge(dim_jenispengaduan, on="id_jenispengaduan", how="left")
-    fact_pengaduan = fact_pengaduan.merge(dim_pelanggan, left_on="idpelanggan", right_on="kodepelanggan", how="left")
+    fact_pengaduan = fact_pengaduan.merge(dim_pelanggan, on="id_pelanggan", how="left")
     fact_pengaduan["year"] = fact_pengaduan["year"].astype(str)  # Pastikan tahun dalam bentuk string
 
     col1, col2, col3 = st.columns([1, 8, 1])
@@ -890,7 +890,7 @@ def show_dashboard_pemutusan():
     # Merge awal (pastikan kolom waktu sudah ada)
     fact_pemutusan = fact_pemutusan.merge(dim_waktu, on="id_waktu", how="left")
     fact_pemutusan = fact_pemutusan.merge(dim_realisasi, on="id_realisasi", how="left")
-    fact_pemutusan = fact_pemutusan.merge(dim_pelanggan, on="kodepelanggan", how="left")
+    fact_pemutusan = fact_pemutusan.merge(dim_pelanggan.drop(columns="kodepelanggan"), on="id_pelanggan", how="left")
 
     fact_pemutusan["year"] = fact_pemutusan["year"].astype(str)
     fact_pemutusan["month"] = pd.to_numeric(fact_pemutusan["month"])  # Pastikan bulan dalam bentuk angka
@@ -925,10 +925,10 @@ def show_dashboard_pemutusan():
         .reset_index()
     )
 
-    # Pemutusan berdasarkan Golongan Tarif
+    # Pemutusan berdasarkan Golongan Tarif; golongan tarif diambil dari fact_transaksi lewat surrogate key
     pemutusan_goltarif = (
         fact_pemutusan_filtered
-        .merge(fact_transaksi, on="kodepelanggan")
+        .merge(fact_transaksi[["id_pelanggan", "kodegoltarif"]].drop_duplicates(), on="id_pelanggan")
         .merge(dim_goltarif, on="kodegoltarif")
         .groupby("kodegoltarif")["kodepelanggan"]
         .nunique()